@@ -4,6 +4,8 @@ import io
 import base64
 from datetime import datetime
 import uuid
+import functools
+import numpy as np
 
 # ReportLab imports
 from reportlab.lib import colors
@@ -12,10 +14,13 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
 from reportlab.lib.colors import HexColor
+from reportlab.lib.utils import simpleSplit
 
-# Arabic shaping imports
-import arabic_reshaper
-from bidi.algorithm import get_display
+# Optional JIT for the totals computation
+try:
+    from numba import njit
+except ImportError:
+    njit = None
 
 # Font registration for Arabic
 from reportlab.pdfbase import pdfmetrics
@@ -25,7 +30,9 @@ from reportlab.pdfbase.ttfonts import TTFont
 # 1) REGISTER AN ARABIC-FRIENDLY TTF FONT    #
 ##############################################
 # Make sure "Amiri-Regular.ttf" is in a "fonts" folder
-pdfmetrics.registerFont(TTFont("Amiri", "fonts/Amiri-Regular.ttf"))
+# Guarded so a re-import (e.g. hot reload) doesn't parse the TTF again
+if "Amiri" not in pdfmetrics.getRegisteredFontNames():
+    pdfmetrics.registerFont(TTFont("Amiri", "fonts/Amiri-Regular.ttf"))
 
 ###########################
 # 2) LANGUAGE DICTIONARIES
@@ -142,37 +149,94 @@ DOC_TYPE_OPTIONS = {
 ###################################################
 # 3) ARABIC SHAPING / RTL HELPER FOR ARABIC TEXT  #
 ###################################################
+# Shaping function, set up on the first Arabic call so other languages
+# never import arabic_reshaper / python-bidi
+_reshape_fn = None
+
+@functools.lru_cache(maxsize=4096)
 def reshape_if_arabic(text, lang):
     """
     If the language is Arabic, we reshape & reorder text (RTL).
     Otherwise, return text as-is.
+    Results are memoized: labels and repeated item descriptions are shaped once.
     """
-    if lang == "ar" and text.strip():
-        reshaped_text = arabic_reshaper.reshape(text)
-        return get_display(reshaped_text)
-    else:
+    if lang != "ar" or not text.strip():
+        return text
+    # ASCII-only text (numbers, dates, emails...) has no Arabic to shape
+    if text.isascii():
         return text
+    global _reshape_fn
+    if _reshape_fn is None:
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+        _reshape_fn = lambda t: get_display(arabic_reshaper.reshape(t))
+    return _reshape_fn(text)
+
+def _build_reshaper(lang):
+    """
+    Returns a one-argument reshape function for the given language,
+    so the Arabic check is resolved once instead of on every call.
+    """
+    if lang == "ar":
+        return lambda text: reshape_if_arabic(text, "ar")
+    return lambda text: text
 
 ###############################
 # 4) PDF GENERATION FUNCTION  #
 ###############################
-def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice):
+# Plain-text lines of the header and supplier / customer blocks,
+# filled with str.format_map before wrapping and reshaping
+HEADER_LINES_TPL = (
+    "{number_label}: {invoice_number}",
+    "{date_label}: {date_time}",
+    "{due_date_label}: {due_date}",
+)
+
+SUPPLIER_LINES_TPL = (
+    "{supplier_name}",
+    "{supplier_address}",
+    "{tax_id_label}: {supplier_tax_id}",
+    "{mobile_label}: {supplier_mobile}",
+    "{email_label}: {supplier_email}",
+)
+
+CUSTOMER_LINES_TPL = (
+    "{customer_name}",
+    "{customer_address}",
+)
+
+def _compute_totals(q, p, r):
     """
-    Generates a PDF (invoice or quote) in memory and returns the BytesIO object.
+    Per-row subtotal and VAT from quantity / price / rate arrays.
+    JIT-compiled with numba when it's installed, plain NumPy otherwise.
+    The sums are left to the caller: numba and NumPy add values in a different order.
+    """
+    subtotal = q * p
+    vat = subtotal * (r / 100.0)
+    return subtotal, vat
+
+if njit is not None:
+    _compute_totals = njit(cache=True)(_compute_totals)
+
+def _running_sum(values):
+    """
+    Sum of values added one after another, like the running total of a plain loop.
+    np.cumsum accumulates in order (unlike the pairwise .sum()), so totals stay to the cent.
+    """
+    return float(np.cumsum(values)[-1]) if len(values) else 0.0
+
+@functools.lru_cache(maxsize=32)
+def _get_styles(lang_choice, primary_color):
+    """
+    Builds the paragraph stylesheet for a language / primary color pair.
+    Cached, so reruns don't rebuild getSampleStyleSheet() on every PDF.
     """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4,
-                            rightMargin=15*mm,
-                            leftMargin=15*mm,
-                            topMargin=15*mm,
-                            bottomMargin=15*mm)
-    
-    story = []
     styles = getSampleStyleSheet()
-    
+
     # If Arabic, we use the "Amiri" font
     # Otherwise, default "Helvetica"
     font_name = "Amiri" if lang_choice == "ar" else "Helvetica"
+    color = HexColor(primary_color)
 
     # Custom Title style
     styles.add(ParagraphStyle(
@@ -180,7 +244,7 @@ def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice
         parent=styles['Title'],
         fontName=font_name,
         fontSize=24,
-        textColor=HexColor(primary_color),
+        textColor=color,
         spaceAfter=30
     ))
     
@@ -190,7 +254,7 @@ def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice
         parent=styles['Heading2'],
         fontName=font_name,
         fontSize=14,
-        textColor=HexColor(primary_color),
+        textColor=color,
         spaceAfter=10
     ))
 
@@ -200,16 +264,148 @@ def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice
         parent=styles['Normal'],
         fontName=font_name
     ))
+    return styles
+
+# Color-independent table styles, shared by every build
+HEADER_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (-1, -1), (-1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+DETAILS_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
+])
+
+# Items table text sizes, default cell padding, and the widest amount
+# the numeric columns are sized for
+ITEMS_HEADER_FONT_SIZE = 12
+ITEMS_BODY_FONT_SIZE = 10
+ITEMS_CELL_PADDING = 6
+
+@functools.lru_cache(maxsize=16)
+def _items_label_widths(header_labels, total_labels, font_name):
+    """
+    Minimum text widths of the numeric items columns for a language (cached per label set):
+    each header label, plus the totals labels for the VAT amount column.
+    """
+    widths = [pdfmetrics.stringWidth(label, font_name, ITEMS_HEADER_FONT_SIZE)
+              for label in header_labels[1:]]
+    widths[3] = max([widths[3]] + [pdfmetrics.stringWidth(t, font_name, ITEMS_BODY_FONT_SIZE)
+                                   for t in total_labels])
+    return widths
+
+def _items_col_widths(header_labels, total_labels, numeric_columns, font_name, table_width):
+    """
+    Items table column widths: numeric columns fit their label and the widest
+    value actually printed in them; the description column gets the rest.
+    """
+    numeric_widths = [
+        max(label_width, max((pdfmetrics.stringWidth(text, font_name, ITEMS_BODY_FONT_SIZE)
+                              for text in column), default=0.0)) + 2 * ITEMS_CELL_PADDING
+        for label_width, column in zip(_items_label_widths(header_labels, total_labels, font_name),
+                                       numeric_columns)
+    ]
+    return [table_width - sum(numeric_widths)] + numeric_widths
+
+@functools.lru_cache(maxsize=16)
+def _items_table_style(primary_color, font_name):
+    """
+    Items table style for a primary color / font pair (cached, HexColor parsed once).
+    """
+    color = HexColor(primary_color)
+    return TableStyle([
+        # Header style
+        ('BACKGROUND', (0, 0), (-1, 0), color),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), font_name),
+        ('FONTSIZE', (0, 0), (-1, 0), ITEMS_HEADER_FONT_SIZE),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+        # Body rows, in the font the description column is wrapped for
+        ('FONTNAME', (0, 1), (-1, -1), font_name),
+        ('FONTSIZE', (0, 1), (-1, -1), ITEMS_BODY_FONT_SIZE),
+
+        # Grid lines
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -2), 0.5, HexColor('#CCCCCC')),
+
+        # Totals lines
+        ('FONTNAME', (-2, -3), (-1, -1), font_name),
+        ('LINEABOVE', (-2, -3), (-1, -3), 1, color),
+    ])
+
+# Body text size of the header / supplier / customer blocks
+TEXT_BLOCK_FONT_SIZE = 10
+
+@functools.lru_cache(maxsize=32)
+def _text_block_style(title_font, body_font, title_color, body_color, title_size):
+    """
+    Style of a text block: a colored title row followed by body lines (cached).
+    """
+    return TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), body_font),
+        ('FONTSIZE', (0, 0), (-1, -1), TEXT_BLOCK_FONT_SIZE),
+        ('LEADING', (0, 0), (-1, -1), TEXT_BLOCK_FONT_SIZE * 1.2),
+        ('TEXTCOLOR', (0, 1), (-1, -1), HexColor(body_color)),
+        ('FONTNAME', (0, 0), (0, 0), title_font),
+        ('FONTSIZE', (0, 0), (0, 0), title_size),
+        ('LEADING', (0, 0), (0, 0), title_size * 1.2),
+        ('TEXTCOLOR', (0, 0), (0, 0), HexColor(title_color)),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ])
+
+def _wrap_text(text, font_name, font_size, width, reshape):
+    """
+    Breaks plain text into lines that fit width (existing newlines are kept).
+    Splits the text in reading order first and only then reshapes each line,
+    so wrapped Arabic lines stay in order from top to bottom.
+    """
+    return "\n".join(reshape(line) for line in simpleSplit(text, font_name, font_size, width))
+
+def _text_block(title, lines, width, reshape, title_font, body_font, title_color, body_color, title_size):
+    """
+    Single-column table of plain strings, styled through TableStyle commands
+    instead of inline <font> markup so ReportLab skips its paragraph parser.
+    Takes unshaped text: long lines are wrapped to the block width, then reshaped.
+    """
+    rows = [[_wrap_text(title, title_font, title_size, width, reshape)]]
+    rows += [[_wrap_text(line, body_font, TEXT_BLOCK_FONT_SIZE, width, reshape)] for line in lines]
+    block = Table(rows, colWidths=[width])
+    block.setStyle(_text_block_style(title_font, body_font, title_color, body_color, title_size))
+    return block
+
+def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice):
+    """
+    Generates a PDF (invoice or quote) in memory and returns the BytesIO object.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4,
+                            rightMargin=15*mm,
+                            leftMargin=15*mm,
+                            topMargin=15*mm,
+                            bottomMargin=15*mm)
     
-    # Reshape doc title if Arabic
-    doc_title = reshape_if_arabic(data["doc_type"], lang_choice)
-    number_label = reshape_if_arabic(lang_dict["number"], lang_choice)
-    date_label = reshape_if_arabic(lang_dict["date"], lang_choice)
-    due_date_label = reshape_if_arabic(lang_dict["due_date"], lang_choice)
+    story = []
+    # Language-specialized reshape (identity unless Arabic)
+    reshape = _build_reshaper(lang_choice)
+    styles = _get_styles(lang_choice, primary_color)
 
+    # If Arabic, we use the "Amiri" font
+    # Otherwise, default "Helvetica"
+    font_name = "Amiri" if lang_choice == "ar" else "Helvetica"
+    bold_font_name = "Amiri" if lang_choice == "ar" else "Helvetica-Bold"
+    
     # Combine date + time
     date_str = data['invoice_date'].strftime("%d/%m/%Y") if data['invoice_date'] else ""
-    date_time_str = f"{date_str} {datetime.now().strftime('%H:%M')}"
+    build_time = data.get('build_time') or datetime.now().strftime('%H:%M')
+    date_time_str = f"{date_str} {build_time}"
 
     due_date_str = data['invoice_due_date'].strftime("%d/%m/%Y") if data['invoice_due_date'] else ""
     
@@ -221,160 +417,158 @@ def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice
     else:
         logo = Paragraph("", styles['NormalArabic'])
     
+    # Gather every header / supplier / customer value once, then fill the line templates
+    # (left unshaped: the text blocks wrap each line before reshaping it if Arabic)
+    vals = {k: data[k] for k in (
+        'invoice_number', 'supplier_name', 'supplier_address', 'supplier_tax_id',
+        'supplier_mobile', 'supplier_email', 'customer_name', 'customer_address'
+    )}
+    vals.update(
+        number_label=lang_dict["number"],
+        date_label=lang_dict["date"],
+        due_date_label=lang_dict["due_date"],
+        date_time=date_time_str,
+        due_date=due_date_str,
+        tax_id_label=lang_dict["tax_id"],
+        mobile_label=lang_dict["mobile"],
+        email_label=lang_dict["email"],
+    )
+
+    # Text blocks fill a half-width cell, minus its default 6pt padding on each side
+    block_width = doc.width/2.0 - 12
+
     # Header
-    header_html = f"""
-    <font color="{primary_color}" size="18"><b>{doc_title.upper()}</b></font><br/>
-    <font color="#666666">
-    {number_label}: {reshape_if_arabic(data['invoice_number'], lang_choice)}<br/>
-    {date_label}: {reshape_if_arabic(date_time_str, lang_choice)}<br/>
-    {due_date_label}: {reshape_if_arabic(due_date_str, lang_choice)}
-    </font>
-    """
+    header_block = _text_block(
+        data["doc_type"].upper(),
+        [line.format_map(vals) for line in HEADER_LINES_TPL],
+        block_width, reshape,
+        bold_font_name, font_name, primary_color, "#666666", 18
+    )
     
-    header_data = [[logo, Paragraph(header_html, styles['NormalArabic'])]]
+    header_data = [[logo, header_block]]
     header_table = Table(header_data, colWidths=[doc.width/2.0]*2)
-    header_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-        ('ALIGN', (-1, -1), (-1, -1), 'RIGHT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
+    header_table.setStyle(HEADER_TABLE_STYLE)
     story.append(header_table)
     story.append(Spacer(1, 20))
 
     # Supplier / Customer block
-    from_label = reshape_if_arabic(lang_dict["from"], lang_choice)
-    to_label = reshape_if_arabic(lang_dict["to"], lang_choice)
-    tax_id_label = reshape_if_arabic(lang_dict["tax_id"], lang_choice)
-    mobile_label = reshape_if_arabic(lang_dict["mobile"], lang_choice)
-    email_label = reshape_if_arabic(lang_dict["email"], lang_choice)
-
-    supplier_html = f"""
-    <font color="{primary_color}"><b>{from_label}:</b></font><br/>
-    {reshape_if_arabic(data['supplier_name'], lang_choice)}<br/>
-    {reshape_if_arabic(data['supplier_address'], lang_choice)}<br/>
-    {tax_id_label}: {reshape_if_arabic(data['supplier_tax_id'], lang_choice)}<br/>
-    {mobile_label}: {reshape_if_arabic(data['supplier_mobile'], lang_choice)}<br/>
-    {email_label}: {reshape_if_arabic(data['supplier_email'], lang_choice)}
-    """
-
-    customer_html = f"""
-    <font color="{primary_color}"><b>{to_label}:</b></font><br/>
-    {reshape_if_arabic(data['customer_name'], lang_choice)}<br/>
-    {reshape_if_arabic(data['customer_address'], lang_choice)}
-    """
+    party_style_args = (bold_font_name, font_name, primary_color, "#000000", TEXT_BLOCK_FONT_SIZE)
 
     details_data = [
         [
-            Paragraph(supplier_html, styles['NormalArabic']),
-            Paragraph(customer_html, styles['NormalArabic'])
+            _text_block(lang_dict["from"] + ":", [line.format_map(vals) for line in SUPPLIER_LINES_TPL],
+                        block_width, reshape, *party_style_args),
+            _text_block(lang_dict["to"] + ":", [line.format_map(vals) for line in CUSTOMER_LINES_TPL],
+                        block_width, reshape, *party_style_args)
         ]
     ]
     
     details_table = Table(details_data, colWidths=[doc.width/2.0]*2)
-    details_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-    ]))
+    details_table.setStyle(DETAILS_TABLE_STYLE)
     story.append(details_table)
     story.append(Spacer(1, 20))
 
     # "Details" subheading
-    details_label = reshape_if_arabic(lang_dict["details"], lang_choice)
+    details_label = reshape(lang_dict["details"])
     story.append(Paragraph(details_label, styles['SubHeading']))
 
     # Table header row
-    hdr_description = reshape_if_arabic(lang_dict["description"], lang_choice)
-    hdr_quantity = reshape_if_arabic(lang_dict["quantity"], lang_choice)
-    hdr_unit_price = reshape_if_arabic(lang_dict["unit_price"], lang_choice)
-    hdr_vat_rate = reshape_if_arabic(lang_dict["vat_rate"], lang_choice)
-    hdr_vat_amount = reshape_if_arabic(lang_dict["vat_amount"], lang_choice)
-    hdr_total = reshape_if_arabic(lang_dict["total"], lang_choice)
-
-    items_data = [[
+    hdr_description = reshape(lang_dict["description"])
+    hdr_quantity = reshape(lang_dict["quantity"])
+    hdr_unit_price = reshape(lang_dict["unit_price"])
+    hdr_vat_rate = reshape(lang_dict["vat_rate"])
+    hdr_vat_amount = reshape(lang_dict["vat_amount"])
+    hdr_total = reshape(lang_dict["total"])
+
+    # Subtotal, total VAT, grand total labels
+    lbl_subtotal = reshape(lang_dict["subtotal"]) + ":"
+    lbl_total_vat = reshape(lang_dict["total_vat"]) + ":"
+    lbl_total = reshape(lang_dict["total"]) + ":"
+
+    # Rows: header + one per item + 3 totals, allocated once
+    n_items = len(items)
+    items_data = [None] * (1 + n_items + 3)
+    items_data[0] = [
         hdr_description, hdr_quantity, hdr_unit_price, hdr_vat_rate, hdr_vat_amount, hdr_total
-    ]]
-
-    # Calculate totals
-    total_without_vat = 0.0
-    total_vat = 0.0
-
-    for item in items:
-        # Reshape each piece if Arabic
-        desc = reshape_if_arabic(item['description'], lang_choice)
-        
-        subtotal = item['quantity'] * item['unit_price']
-        vat_amount = subtotal * (item['vat_rate'] / 100)
-        line_total = subtotal + vat_amount
-
-        total_without_vat += subtotal
-        total_vat += vat_amount
-
-        row_data = [
-            desc,
-            str(item['quantity']),
-            f"{item['unit_price']:.2f}",
-            f"{item['vat_rate']}%",
-            f"{vat_amount:.2f}",
-            f"{line_total:.2f}"
-        ]
+    ]
+
+    # Split items into columns once (descriptions stay strings, numbers go to NumPy)
+    descs = [i['description'] for i in items]
+    qtys = [i['quantity'] for i in items]
+    prices = [i['unit_price'] for i in items]
+    rates = [i['vat_rate'] for i in items]
+
+    # Calculate totals in one vectorized pass
+    q = np.array(qtys, dtype=np.float64)
+    p = np.array(prices, dtype=np.float64)
+    v = np.array(rates, dtype=np.float64)
+    subtotals, vat_amounts = _compute_totals(q, p, v)
+    line_totals = subtotals + vat_amounts
+    total_without_vat = _running_sum(subtotals)
+    total_vat = _running_sum(vat_amounts)
+
+    # Format the numeric columns once (the formatter is resolved outside the comprehensions)
+    fmt = "{:.2f}".format
+    grand_total = total_without_vat + total_vat
+    qty_strs = [str(qty) for qty in qtys]
+    price_strs = [fmt(price) for price in prices]
+    rate_strs = [f"{rate}%" for rate in rates]
+    vat_strs = [fmt(vat_amount) for vat_amount in vat_amounts]
+    line_total_strs = [fmt(line_total) for line_total in line_totals]
+    total_strs = [fmt(total_without_vat), fmt(total_vat), fmt(grand_total)]
+
+    # Fixed column widths, sized from the labels and the values actually printed,
+    # skip ReportLab's content-based width pass over every row
+    col_widths = _items_col_widths(
+        (hdr_description, hdr_quantity, hdr_unit_price, hdr_vat_rate, hdr_vat_amount, hdr_total),
+        (lbl_subtotal, lbl_total_vat, lbl_total),
+        (qty_strs, price_strs, rate_strs, vat_strs, line_total_strs + total_strs),
+        font_name, doc.width
+    )
+    desc_width = col_widths[0] - 2 * ITEMS_CELL_PADDING
+
+    rows = zip(descs, qty_strs, price_strs, rate_strs, vat_strs, line_total_strs)
+    for idx, (d, qty, price, rate, vat_amount, line_total) in enumerate(rows, start=1):
+        # Wrap to the description column in reading order, then reshape each line if Arabic
+        desc = _wrap_text(d, font_name, ITEMS_BODY_FONT_SIZE, desc_width, reshape)
+
+        row_data = [desc, qty, price, rate, vat_amount, line_total]
         # If Arabic, we might reshape each piece for consistency, but numeric data is typically unaffected.
         # However, you might want to reshape percentages or something else if needed.
-        items_data.append(row_data)
+        items_data[idx] = row_data
 
-    grand_total = total_without_vat + total_vat
     # Subtotal, total VAT, grand total rows
-    lbl_subtotal = reshape_if_arabic(lang_dict["subtotal"], lang_choice)
-    lbl_total_vat = reshape_if_arabic(lang_dict["total_vat"], lang_choice)
-    lbl_total = reshape_if_arabic(lang_dict["total"], lang_choice)
-
-    items_data.extend([
-        ['', '', '', '', lbl_subtotal + ":", f"{total_without_vat:.2f}"],
-        ['', '', '', '', lbl_total_vat + ":", f"{total_vat:.2f}"],
-        ['', '', '', '', lbl_total + ":", f"{grand_total:.2f}"]
-    ])
-
-    items_table = Table(items_data, repeatRows=1)
-    items_table.setStyle(TableStyle([
-        # Header style
-        ('BACKGROUND', (0, 0), (-1, 0), HexColor(primary_color)),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), font_name),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-
-        # Grid lines
-        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -2), 0.5, HexColor('#CCCCCC')),
+    items_data[-3:] = [
+        ['', '', '', '', lbl_subtotal, total_strs[0]],
+        ['', '', '', '', lbl_total_vat, total_strs[1]],
+        ['', '', '', '', lbl_total, total_strs[2]]
+    ]
 
-        # Totals lines
-        ('FONTNAME', (-2, -3), (-1, -1), font_name),
-        ('LINEABOVE', (-2, -3), (-1, -3), 1, HexColor(primary_color)),
-    ]))
+    items_table = Table(items_data, colWidths=col_widths, repeatRows=1)
+    items_table.setStyle(_items_table_style(primary_color, font_name))
     story.append(items_table)
 
     # Payment Terms
     if data['payment_terms']:
         story.append(Spacer(1, 20))
-        label_pt = reshape_if_arabic(lang_dict["payment_terms"], lang_choice)
+        label_pt = reshape(lang_dict["payment_terms"])
         story.append(Paragraph(f"<b>{label_pt}</b>:", styles['SubHeading']))
-        shaped_pt = reshape_if_arabic(data['payment_terms'], lang_choice)
+        shaped_pt = reshape(data['payment_terms'])
         story.append(Paragraph(shaped_pt, styles['NormalArabic']))
 
     # Delivery Terms
     if data['delivery_terms']:
         story.append(Spacer(1, 10))
-        label_dt = reshape_if_arabic(lang_dict["delivery_terms"], lang_choice)
+        label_dt = reshape(lang_dict["delivery_terms"])
         story.append(Paragraph(f"<b>{label_dt}</b>:", styles['SubHeading']))
-        shaped_dt = reshape_if_arabic(data['delivery_terms'], lang_choice)
+        shaped_dt = reshape(data['delivery_terms'])
         story.append(Paragraph(shaped_dt, styles['NormalArabic']))
 
     # Accept checks
     if data['accept_checks']:
         story.append(Spacer(1, 10))
-        label_ac = reshape_if_arabic(lang_dict["accept_checks"], lang_choice)
-        story.append(Paragraph(f"<b>{label_ac}</b> {reshape_if_arabic('Yes', lang_choice)}", styles['NormalArabic']))
+        label_ac = reshape(lang_dict["accept_checks"])
+        story.append(Paragraph(f"<b>{label_ac}</b> {reshape('Yes')}", styles['NormalArabic']))
     
     # Build
     doc.build(story)
@@ -384,16 +578,60 @@ def create_modern_invoice_pdf(data, items, lang_dict, primary_color, lang_choice
 ################################
 # 5) PDF DISPLAY (IFRAME) HELPER
 ################################
+@st.cache_data(show_spinner=False, max_entries=8)
 def get_pdf_iframe(pdf_bytes):
-    base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
+    # Cached on the PDF bytes so unchanged previews skip the base64 re-encode
+    base64_pdf = base64.b64encode(pdf_bytes).decode('ascii')
     pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="700" height="1000" type="application/pdf"></iframe>'
     return pdf_display
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _build_pdf_bytes(data_tuple, items_tuple, lang_choice, primary_color):
+    """
+    Cached wrapper around create_modern_invoice_pdf.
+    Takes hashable inputs (the logo as raw bytes) so Streamlit reruns
+    with unchanged inputs reuse the previous PDF instead of rebuilding it.
+    """
+    data = dict(data_tuple)
+    if data['logo']:
+        data['logo'] = io.BytesIO(data['logo'])
+    items = [dict(item) for item in items_tuple]
+    pdf_buffer = create_modern_invoice_pdf(data, items, LANGUAGES[lang_choice], primary_color, lang_choice)
+    return pdf_buffer.getvalue()
+
 ################################
 # 6) STREAMLIT APP ENTRY POINT
 ################################
+@st.fragment
+def _download_section(pdf_bytes, lang_dict, lang_choice, file_name):
+    """
+    Download button and its validation message.
+    Runs as a fragment: clicking it reruns only this section, not the form and preview.
+    """
+    if st.button(lang_dict["download"]):
+        if len(st.session_state["items"]) == 0:
+            if lang_choice == "en":
+                st.error("Please add at least one item.")
+            elif lang_choice == "fr":
+                st.error("Veuillez ajouter au moins un article.")
+            else:  # ar
+                st.error("الرجاء إضافة عنصر واحد على الأقل.")
+        else:
+            # Reuse the preview PDF for download
+            st.download_button(
+                label=lang_dict["download"],
+                data=pdf_bytes,
+                file_name=file_name,
+                mime="application/pdf"
+            )
+
 def main():
     st.set_page_config(layout="wide")
+
+    # Draw the default document number once per session, not on every rerun
+    # (kept outside the widget state: the widget is recreated when the language changes)
+    if "default_invoice_number" not in st.session_state:
+        st.session_state["default_invoice_number"] = str(uuid.uuid4())[:8]
     
     # 6.1 Language
     lang_choice = st.selectbox("Select Language / Choisir la langue / اختر اللغة", ["en", "fr", "ar"])
@@ -434,7 +672,7 @@ def main():
 
         # Document Info
         st.subheader(lang_dict["document_info"])
-        invoice_number = st.text_input(lang_dict["number"], value=str(uuid.uuid4())[:8])
+        invoice_number = st.text_input(lang_dict["number"], value=st.session_state["default_invoice_number"])
         invoice_date = st.date_input(lang_dict["date"])
         invoice_due_date = st.date_input(lang_dict["due_date"], value=None)
 
@@ -500,32 +738,26 @@ def main():
             "accept_checks": accept_checks
         }
 
-        # Generate PDF
-        pdf_bytes = create_modern_invoice_pdf(data, st.session_state["items"], lang_dict, primary_color, lang_choice)
+        # Hashable snapshot of the inputs (logo file handle -> raw bytes)
+        data_tuple = tuple({**data, "logo": logo_file.getvalue() if logo_file else None}.items())
+        items_tuple = tuple(tuple(item.items()) for item in st.session_state["items"])
+
+        # Stamp the build time only when the inputs change, so no-op reruns keep the same PDF
+        content_key = (data_tuple, items_tuple, lang_choice, primary_color)
+        if st.session_state.get("content_key") != content_key:
+            st.session_state["content_key"] = content_key
+            st.session_state["build_time"] = datetime.now().strftime("%H:%M")
+        data_tuple += (("build_time", st.session_state["build_time"]),)
+
+        # Generate PDF (cached: no-op reruns skip the ReportLab build)
+        pdf_bytes = _build_pdf_bytes(data_tuple, items_tuple, lang_choice, primary_color)
         # Show PDF in iframe
-        pdf_display = get_pdf_iframe(pdf_bytes.read())
+        pdf_display = get_pdf_iframe(pdf_bytes)
         st.markdown(pdf_display, unsafe_allow_html=True)
 
     # Download button
     st.markdown("---")
-    if st.button(lang_dict["download"]):
-        if len(st.session_state["items"]) == 0:
-            if lang_choice == "en":
-                st.error("Please add at least one item.")
-            elif lang_choice == "fr":
-                st.error("Veuillez ajouter au moins un article.")
-            else:  # ar
-                st.error("الرجاء إضافة عنصر واحد على الأقل.")
-        else:
-            # Re-generate for download
-            pdf_bytes = create_modern_invoice_pdf(data, st.session_state["items"], lang_dict, primary_color, lang_choice)
-            file_name = f"{doc_type}_{invoice_number}.pdf"
-            st.download_button(
-                label=lang_dict["download"],
-                data=pdf_bytes,
-                file_name=file_name,
-                mime="application/pdf"
-            )
+    _download_section(pdf_bytes, lang_dict, lang_choice, f"{doc_type}_{invoice_number}.pdf")
 
 if __name__ == "__main__":
     main()